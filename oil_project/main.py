@@ -4,6 +4,7 @@ import sys
 import glob
 from datetime import datetime
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 # إضافة المسار إلى مجلد scripts لاستيراد الوحدات
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
@@ -18,6 +19,8 @@ from oil_project.scripts.utils import load_data, save_dataframe
 def get_latest_cleaned_file(base_dir):
     """
     دالة للعثور على أحدث ملف بيانات منظف بناءً على التاريخ في اسم الملف.
+    يتم أولاً قراءة ملف latest.txt الذي تكتبه خطوة التنظيف، وإلا يتم البحث في المجلد
+    مع تفضيل ملفات Parquet إن وجدت والرجوع إلى ملفات CSV.
 
     Args:
         base_dir (str): المسار الأساسي للمشروع.
@@ -27,8 +30,18 @@ def get_latest_cleaned_file(base_dir):
     """
     data_dir = os.path.join(base_dir, "data", "processed")
     try:
-        # البحث عن ملفات باسم يبدأ بـ "cleaned_oil_field_production_data_" وينتهي بـ ".csv"
-        files = glob.glob(os.path.join(data_dir, "cleaned_oil_field_production_data_*.csv"))
+        manifest_path = os.path.join(data_dir, "latest.txt")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                latest_file = os.path.join(data_dir, f.read().strip())
+            if os.path.isfile(latest_file):
+                print(f"أحدث ملف بيانات منظف: {latest_file}")
+                return latest_file
+
+        # البحث عن ملفات باسم يبدأ بـ "cleaned_oil_field_production_data_" بصيغة Parquet أولاً ثم CSV
+        files = glob.glob(os.path.join(data_dir, "cleaned_oil_field_production_data_*.parquet"))
+        if not files:
+            files = glob.glob(os.path.join(data_dir, "cleaned_oil_field_production_data_*.csv"))
         if not files:
             print("لم يتم العثور على ملفات بيانات منظفة!")
             return None
@@ -75,23 +88,34 @@ def main():
             print("تخطي خطوات التحليل، النمذجة، ولوحة التحكم بسبب عدم وجود بيانات منظفة.")
             return
 
-        # خطوة التحليل الاستكشافي
-        if 'eda' in args.steps:
-            print("--- تنفيذ خطوة التحليل الاستكشافي ---")
-            try:
-                perform_eda(latest_file)
-            except Exception as e:
-                print(f"خطأ أثناء التحليل الاستكشافي: {e}")
-                return
-
-        # خطوة النمذجة
-        if 'model' in args.steps:
-            print("--- تنفيذ خطوة النمذجة ---")
-            try:
-                train_model(latest_file)
-            except Exception as e:
-                print(f"خطأ أثناء النمذجة: {e}")
-                return
+        # خطوتا التحليل الاستكشافي والنمذجة مستقلتان عن بعضهما (تقرآن نفس الملف المنظف)،
+        # لذا يتم تشغيلهما بالتوازي في عمليتين منفصلتين عند طلبهما معاً
+        analysis_steps = [
+            (func, label)
+            for step, func, label in [
+                ('eda', perform_eda, "التحليل الاستكشافي"),
+                ('model', train_model, "النمذجة"),
+            ]
+            if step in args.steps
+        ]
+        if len(analysis_steps) > 1:
+            print("--- تنفيذ خطوتي التحليل الاستكشافي والنمذجة بالتوازي ---")
+            with ProcessPoolExecutor(max_workers=len(analysis_steps)) as executor:
+                futures = [(label, executor.submit(func, latest_file)) for func, label in analysis_steps]
+                for label, future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"خطأ أثناء {label}: {e}")
+                        return
+        else:
+            for func, label in analysis_steps:
+                print(f"--- تنفيذ خطوة {label} ---")
+                try:
+                    func(latest_file)
+                except Exception as e:
+                    print(f"خطأ أثناء {label}: {e}")
+                    return
 
         # خطوة تشغيل لوحة التحكم
         if 'dashboard' in args.steps:
@@ -1,28 +1,29 @@
 import os
 import pandas as pd
 import numpy as np
-from scipy import stats
-from oil_project.scripts.utils import load_data, clean_column_names, save_dataframe
-
-# تحديد seed للتكرارية
-np.random.seed(42)
+from oil_project.scripts.utils import load_data, clean_column_names, save_dataframe, downcast_dtypes
 
 # تحديد مسار المشروع الرئيسي بشكل ديناميكي
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 input_path = os.path.join(base_dir, "data", "raw", "oil_field_production_data.csv")
 
-def handle_missing_values(df):
+def handle_missing_values(df, verbose=False):
     """
     دالة لمعالجة القيم المفقودة في إطار البيانات.
+
+    Args:
+        df (pandas.DataFrame): إطار البيانات.
+        verbose (bool): طباعة نسبة القيم المفقودة لكل عمود (تتطلب تمريرة إضافية على البيانات).
     """
     print("\n--- معالجة القيم المفقودة ---")
-    print("نسبة القيم المفقودة لكل عمود:")
-    print(df.isnull().mean() * 100)
+    if verbose:
+        print("نسبة القيم المفقودة لكل عمود:")
+        print(df.isnull().mean() * 100)
     
     # ملء القيم المفقودة للأعمدة الرقمية بالمتوسط
     numeric_cols = df.select_dtypes(include=[np.number]).columns
-    for col in numeric_cols:
-        df[col] = df[col].fillna(df[col].mean())
+    means = df[numeric_cols].mean(numeric_only=True)
+    df[numeric_cols] = df[numeric_cols].fillna(means)
     
     # إسقاط الصفوف التي تحتوي على قيم مفقودة في الأعمدة غير الرقمية
     non_numeric_cols = df.select_dtypes(exclude=[np.number]).columns
@@ -36,18 +37,22 @@ def handle_outliers(df, columns, method="IQR"):
     دالة لمعالجة القيم الشاذة باستخدام IQR أو Z-score.
     """
     print("\n--- معالجة القيم الشاذة ---")
-    for col in columns:
-        if method == "IQR":
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            df[col] = df[col].clip(lower=lower_bound, upper=upper_bound)
-        elif method == "zscore":
-            z_scores = np.abs(stats.zscore(df[col]))
-            df[col] = df[col].where(z_scores < 3, df[col].mean())
-        print(f"تم معالجة القيم الشاذة في العمود: {col}")
+    if not columns:
+        return df
+    if method == "IQR":
+        # حساب الربيعيات لجميع الأعمدة في تمريرة واحدة ثم القص في نفس المصفوفة
+        arr = df[columns].to_numpy(dtype=np.float64, copy=True)
+        Q1, Q3 = np.nanpercentile(arr, [25, 75], axis=0)
+        IQR = Q3 - Q1
+        np.clip(arr, Q1 - 1.5 * IQR, Q3 + 1.5 * IQR, out=arr)
+        df[columns] = arr
+    elif method == "zscore":
+        # تعبير واحد مدمج يستبدل القيم التي يتجاوز Z-score لها 3 بمتوسط العمود
+        arr = df[columns].to_numpy(dtype=np.float64)
+        means = np.nanmean(arr, axis=0)
+        stds = np.nanstd(arr, axis=0)
+        df[columns] = np.where(np.abs(arr - means) < 3 * stds, arr, means)
+    print(f"تم معالجة القيم الشاذة في الأعمدة: {', '.join(columns)}")
     return df
 
 def main():
@@ -56,7 +61,8 @@ def main():
     """
     # تحميل البيانات
     print(f"\n--- تحميل البيانات من: {input_path} ---")
-    df = load_data(input_path)
+    # التحميل بدقة float64 حتى تُحسب المتوسطات والربيعيات على القيم الأصلية؛ التقليص يتم قبل الحفظ فقط
+    df = load_data(input_path, downcast=False)
     
     # ملخص قبل التنظيف
     print("\n--- ملخص البيانات قبل التنظيف ---")
@@ -87,9 +93,21 @@ def main():
     print("\nالإحصاءات الوصفية:")
     print(df.describe())
     
+    # تقليص أنواع البيانات لتقليل حجم الملفات المحفوظة وتسريع قراءتها في الخطوات اللاحقة
+    df = downcast_dtypes(df, categorical_cols=['field_name', 'status', 'well_id'])
+    
     # حفظ البيانات المنظفة في المسار الصحيح
     output_dir = os.path.join(base_dir, "data", "processed")
-    save_dataframe(df, "cleaned_oil_field_production_data", output_dir=output_dir)
+    output_path = save_dataframe(df, "cleaned_oil_field_production_data", output_dir=output_dir)
+    
+    # حفظ نسخة Parquet لتسريع القراءة في خطوات التحليل والنمذجة ولوحة التحكم
+    parquet_path = output_path.replace(".csv", ".parquet")
+    df.to_parquet(parquet_path, index=False, compression="zstd")
+    print(f"تم حفظ نسخة Parquet في: {parquet_path}")
+    
+    # تسجيل اسم أحدث ملف منظف ليقرأه main.py مباشرةً دون البحث في المجلد
+    with open(os.path.join(output_dir, "latest.txt"), "w", encoding="utf-8") as f:
+        f.write(os.path.basename(parquet_path))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
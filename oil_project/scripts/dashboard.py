@@ -9,10 +9,43 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 import os
-from oil_project.scripts.utils import load_data, create_histogram, create_scatter, create_boxplot, create_heatmap, create_timeseries
+from functools import lru_cache
+from oil_project.scripts.utils import (load_data, create_histogram, create_scatter, create_boxplot, create_heatmap,
+                                       create_timeseries, pearson_corr, sample_seed)
 
-# تحديد seed للتكرارية
-np.random.seed(42)
+# الحد الأقصى لعدد النقاط المرسلة إلى الرسوم المبعثرة والصندوقية
+max_plot_points = 20000
+# أقل عدد من الصفوف يُحتفظ به لكل حقل عند أخذ العينة حتى لا تختفي الحقول الصغيرة من الرسوم
+min_points_per_group = 200
+
+def sample_for_plot(df, n=max_plot_points, seed=sample_seed, group_col='field_name', min_per_group=min_points_per_group):
+    """
+    دالة لأخذ عينة طبقية من البيانات (بنفس النسبة من كل حقل مع حد أدنى لكل حقل)
+    لتقليل حجم الرسوم البيانية المرسلة إلى المتصفح.
+
+    Args:
+        df (pandas.DataFrame): إطار البيانات.
+        n (int): الحد الأقصى التقريبي لعدد الصفوف.
+        seed (int): بذرة مولّد الأرقام العشوائية (نفس التصفية تُعطي نفس العينة).
+        group_col (str): عمود الطبقات (إذا لم يكن موجوداً تُؤخذ عينة منتظمة).
+        min_per_group (int): أقل عدد من الصفوف لكل طبقة (أو كامل الطبقة إن كانت أصغر).
+
+    Returns:
+        pandas.DataFrame: إطار البيانات كما هو إذا كان أصغر من n، وإلا العينة بترتيبها الأصلي.
+    """
+    if len(df) <= n:
+        return df
+    rng = np.random.default_rng(seed)
+    if group_col not in df.columns:
+        return df.iloc[np.sort(rng.choice(len(df), size=n, replace=False))]
+    codes = pd.factorize(df[group_col])[0]
+    frac = n / len(df)
+    positions = []
+    for code in np.unique(codes):
+        group_positions = np.flatnonzero(codes == code)
+        size = min(len(group_positions), max(min_per_group, int(round(len(group_positions) * frac))))
+        positions.append(rng.choice(group_positions, size=size, replace=False))
+    return df.iloc[np.sort(np.concatenate(positions))]
 
 def main(input_path=None):
     """
@@ -40,8 +73,36 @@ def main(input_path=None):
     numeric_cols = ['oil_production_bbl', 'gas_production_mcf', 'water_production_bbl', 
                     'wellhead_pressure_psi', 'tubing_pressure_psi', 'choke_size_in', 'pump_efficiency__']
 
-    # تحويل عمود التاريخ إلى datetime
+    # تحويل عمود التاريخ إلى datetime وترتيب البيانات حسب التاريخ لتمكين التصفية بالبحث الثنائي
     df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    df = df.sort_values('date', kind='stable').reset_index(drop=True)
+
+    # تجميع مسبق يومي لكل حقل لتسريع حساب المقاييس والسلسلة الزمنية في رد الفعل
+    # (الجمع يتم بدقة float64 حتى لو كانت البيانات المحفوظة بصيغة float32)
+    daily = df.assign(oil_production_bbl=df['oil_production_bbl'].astype(np.float64)).groupby(
+        ['field_name', 'date'], as_index=False, observed=True).agg(
+        oil_sum=('oil_production_bbl', 'sum'),
+        oil_count=('oil_production_bbl', 'count')
+    ).sort_values('date', kind='stable').reset_index(drop=True)
+    df_dates = df['date'].to_numpy()
+    daily_dates = daily['date'].to_numpy()
+
+    def slice_by_date(frame, dates, start_date, end_date):
+        """
+        دالة لاقتطاع الصفوف ضمن فترة زمنية من إطار بيانات مرتب حسب التاريخ باستخدام searchsorted.
+
+        Args:
+            frame (pandas.DataFrame): إطار البيانات المرتب حسب التاريخ.
+            dates (numpy.ndarray): مصفوفة تواريخ الإطار.
+            start_date (str): تاريخ بداية الفترة.
+            end_date (str): تاريخ نهاية الفترة.
+
+        Returns:
+            pandas.DataFrame: الصفوف الواقعة ضمن الفترة.
+        """
+        lo = np.searchsorted(dates, pd.Timestamp(start_date).to_datetime64(), side='left')
+        hi = np.searchsorted(dates, pd.Timestamp(end_date).to_datetime64(), side='right')
+        return frame.iloc[lo:hi]
 
     # إعداد خيارات التصفية
     field_options = [{'label': field, 'value': field} for field in df['field_name'].unique()]
@@ -79,55 +140,75 @@ def main(input_path=None):
         }
     )
 
+    # حساب جميع المقاييس مرة واحدة لاستخدامها في KPIs والرؤى
+    def compute_summary(df_filtered, daily_filtered):
+        """
+        دالة لحساب المقاييس الإجمالية للبيانات المصفاة في تمريرة واحدة.
+
+        Args:
+            df_filtered (pandas.DataFrame): إطار البيانات بعد التصفية.
+            daily_filtered (pandas.DataFrame): التجميع اليومي لكل حقل بعد التصفية.
+
+        Returns:
+            dict: المقاييس (الإجمالي، المتوسط، الآبار النشطة، أعلى حقل، الارتباط).
+        """
+        totals = daily_filtered[['oil_sum', 'oil_count']].sum()
+        field_totals = daily_filtered.groupby('field_name', observed=True)['oil_sum'].sum()
+        active_mask = df_filtered['status'].to_numpy() == 'Active'
+        return {
+            'total_oil': totals['oil_sum'],
+            'avg_oil': totals['oil_sum'] / totals['oil_count'] if totals['oil_count'] else float('nan'),
+            'active_wells': df_filtered['well_id'][active_mask].nunique(),
+            'top_field': field_totals.idxmax(),
+            'corr_pressure_oil': pearson_corr(df_filtered['wellhead_pressure_psi'].to_numpy(),
+                                              df_filtered['oil_production_bbl'].to_numpy()),
+        }
+
     # تصميم المقاييس الرئيسية (KPIs)
-    def create_kpis(df_filtered):
+    def create_kpis(summary):
         """
         دالة لإنشاء المقاييس الرئيسية (KPIs) بناءً على البيانات المصفاة.
 
         Args:
-            df_filtered (pandas.DataFrame): إطار البيانات بعد التصفية.
+            summary (dict): المقاييس المحسوبة بواسطة compute_summary.
 
         Returns:
             dash.html.Div: عنصر يحتوي على المقاييس الرئيسية.
         """
-        total_oil = df_filtered['oil_production_bbl'].sum()
-        avg_daily_oil = df_filtered['oil_production_bbl'].mean()
-        active_wells = df_filtered[df_filtered['status'] == 'Active']['well_id'].nunique()
-        
         return html.Div([
             dbc.Row([
                 dbc.Col(html.Div([
                     html.H5("إجمالي إنتاج النفط (برميل)", style={'textAlign': 'center'}),
-                    html.H3(f"{total_oil:,.2f}", style={'textAlign': 'center', 'color': '#007bff'})
+                    html.H3(f"{summary['total_oil']:,.2f}", style={'textAlign': 'center', 'color': '#007bff'})
                 ], className="border rounded p-3")),
                 dbc.Col(html.Div([
                     html.H5("متوسط الإنتاج اليومي (برميل)", style={'textAlign': 'center'}),
-                    html.H3(f"{avg_daily_oil:,.2f}", style={'textAlign': 'center', 'color': '#28a745'})
+                    html.H3(f"{summary['avg_oil']:,.2f}", style={'textAlign': 'center', 'color': '#28a745'})
                 ], className="border rounded p-3")),
                 dbc.Col(html.Div([
                     html.H5("عدد الآبار النشطة", style={'textAlign': 'center'}),
-                    html.H3(f"{active_wells}", style={'textAlign': 'center', 'color': '#dc3545'})
+                    html.H3(f"{summary['active_wells']}", style={'textAlign': 'center', 'color': '#dc3545'})
                 ], className="border rounded p-3")),
             ])
         ])
 
     # تصميم صفحة التحليل الوصفي (Insights)
-    def create_insights(df_filtered):
+    def create_insights(summary):
         """
         دالة لإنشاء صفحة الرؤى التحليلية بناءً على البيانات المصفاة.
 
         Args:
-            df_filtered (pandas.DataFrame): إطار البيانات بعد التصفية.
+            summary (dict): المقاييس المحسوبة بواسطة compute_summary.
 
         Returns:
             dash.html.Div: عنصر يحتوي على الرؤى التحليلية.
         """
         insights = [
-            f"إجمالي إنتاج النفط: {df_filtered['oil_production_bbl'].sum():,.2f} برميل",
-            f"متوسط إنتاج النفط اليومي: {df_filtered['oil_production_bbl'].mean():,.2f} برميل",
-            f"عدد الآبار النشطة: {df_filtered[df_filtered['status'] == 'Active']['well_id'].nunique()}",
-            f"أعلى حقل إنتاجي: {df_filtered.groupby('field_name')['oil_production_bbl'].sum().idxmax()}",
-            f"الارتباط بين الضغط وإنتاج النفط: {df_filtered['wellhead_pressure_psi'].corr(df_filtered['oil_production_bbl']):.2f}"
+            f"إجمالي إنتاج النفط: {summary['total_oil']:,.2f} برميل",
+            f"متوسط إنتاج النفط اليومي: {summary['avg_oil']:,.2f} برميل",
+            f"عدد الآبار النشطة: {summary['active_wells']}",
+            f"أعلى حقل إنتاجي: {summary['top_field']}",
+            f"الارتباط بين الضغط وإنتاج النفط: {summary['corr_pressure_oil']:.2f}"
         ]
         return html.Div([
             html.H3("رؤى تحليلية", style={'textAlign': 'right'}),
@@ -165,6 +246,40 @@ def main(input_path=None):
         ])
     ], fluid=True)
 
+    def filter_data(field, start_date, end_date):
+        """
+        دالة لتصفية البيانات حسب الحقل والفترة الزمنية.
+
+        Args:
+            field (str): الحقل النفطي المختار.
+            start_date (pandas.Timestamp): تاريخ بداية الفترة.
+            end_date (pandas.Timestamp): تاريخ نهاية الفترة.
+
+        Returns:
+            tuple: الصفوف الأصلية المصفاة، والتجميع اليومي المصفى.
+        """
+        df_filtered = slice_by_date(df, df_dates, start_date, end_date)
+        daily_filtered = slice_by_date(daily, daily_dates, start_date, end_date)
+        if field != 'all':
+            df_filtered = df_filtered[df_filtered['field_name'] == field]
+            daily_filtered = daily_filtered[daily_filtered['field_name'] == field]
+        return df_filtered, daily_filtered
+
+    # التخزين المؤقت مفتاحه قيم التصفية فقط (بعد توحيدها إلى Timestamp)، والناتج دالة نقية فيها،
+    # لذلك مشاركته بين جميع الجلسات آمنة. لا يُستخدم dash.no_update لكل مخرج على حدة لأن المخرجات
+    # السبعة كلها تعتمد على المدخلات الثلاثة (الحقل والبداية والنهاية)، فلا يوجد مخرج لا يتأثر بأي تغيير.
+    @lru_cache(maxsize=8)
+    def cached_scatter_and_heatmap(field, start_date, end_date):
+        """
+        دالة لإنشاء الرسم المبعثر والخريطة الحرارية مع تخزين آخر النتائج لإعادة استخدامها
+        عند تكرار نفس التصفية.
+        """
+        df_filtered, _ = filter_data(field, start_date, end_date)
+        fig_scatter = create_scatter(sample_for_plot(df_filtered), "wellhead_pressure_psi", "oil_production_bbl",
+                                     color_col="field_name")
+        fig_heatmap = create_heatmap(df_filtered, numeric_cols)
+        return fig_scatter, fig_heatmap
+
     # رد الفعل لتحديث الرسوم بناءً على التصفية
     @app.callback(
         [
@@ -194,25 +309,24 @@ def main(input_path=None):
         Returns:
             tuple: الرسوم البيانية والمقاييس والرؤى.
         """
-        # تصفية البيانات
-        df_filtered = df.copy()
-        if field != 'all':
-            df_filtered = df_filtered[df_filtered['field_name'] == field]
-        df_filtered = df_filtered[
-            (df_filtered['date'] >= start_date) & 
-            (df_filtered['date'] <= end_date)
-        ]
+        filter_key = (field, pd.Timestamp(start_date), pd.Timestamp(end_date))
+        df_filtered, daily_filtered = filter_data(*filter_key)
+        daily_totals = daily_filtered.groupby('date', as_index=False, sort=False)['oil_sum'].sum().rename(
+            columns={'oil_sum': 'oil_production_bbl'})
         
         # إنشاء الرسوم البيانية
         fig_hist = create_histogram(df_filtered, "oil_production_bbl")
-        fig_scatter = create_scatter(df_filtered, "wellhead_pressure_psi", "oil_production_bbl", color_col="field_name")
-        fig_box = create_boxplot(df_filtered, "oil_production_bbl", group_by="field_name")
-        fig_heatmap = create_heatmap(df_filtered, numeric_cols)
-        fig_timeseries = create_timeseries(df_filtered, "date", "oil_production_bbl")
+        fig_scatter, fig_heatmap = cached_scatter_and_heatmap(*filter_key)
+        fig_box = create_boxplot(sample_for_plot(df_filtered), "oil_production_bbl", group_by="field_name")
+        # السلسلة الزمنية هنا تعرض إجمالي الإنتاج اليومي لجميع الآبار المصفاة (من التجميع المسبق)،
+        # بخلاف سلسلة تقرير EDA التي تعرض قيم كل بئر كما هي، لذلك يُوضَّح ذلك في العنوان
+        fig_timeseries = create_timeseries(daily_totals, "date", "oil_production_bbl")
+        fig_timeseries.update_layout(title_text="إجمالي إنتاج النفط اليومي (oil_production_bbl)")
         
         # إنشاء المقاييس الرئيسية والرؤى
-        kpis = create_kpis(df_filtered)
-        insights = create_insights(df_filtered)
+        summary = compute_summary(df_filtered, daily_filtered)
+        kpis = create_kpis(summary)
+        insights = create_insights(summary)
         
         return fig_hist, fig_scatter, fig_box, fig_heatmap, fig_timeseries, kpis, insights
 
@@ -1,52 +1,96 @@
 import os
+import glob
+import hashlib
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
 from sklearn.metrics import mean_squared_error, r2_score
 import plotly.express as px
 import plotly.graph_objects as go
-from oil_project.scripts.utils import load_data, save_figure, save_report
-
-# تحديد seed للتكرارية
-np.random.seed(42)
+from oil_project.scripts.utils import load_data, save_figure, save_report, get_date_suffix
 
 # تحديد مسار المشروع الرئيسي بشكل ديناميكي
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 figures_dir = os.path.join(base_dir, "outputs", "figures")  # تغيير إلى figures
 reports_dir = os.path.join(base_dir, "outputs", "reports")  # للتقارير
+cache_dir = os.path.join(base_dir, "outputs", "cache")  # لتخزين نتائج التحضير المؤقتة
+max_cache_files = 8
+preprocess_cache_version = 2  # يُزاد عند تغيير شكل مخرجات preprocess_for_modeling
+
+model_features = ['gas_production_mcf', 'water_production_bbl', 'wellhead_pressure_psi', 
+                  'tubing_pressure_psi', 'choke_size_in', 'pump_efficiency__', 'field_name']
+model_target = 'oil_production_bbl'
+
+def get_preprocess_cache_path(input_path):
+    """
+    دالة لحساب مسار ملف التخزين المؤقت بناءً على وقت تعديل ملف الإدخال وحجمه وقائمة الميزات.
+    """
+    key_source = (f"{preprocess_cache_version}:{os.path.getmtime(input_path)}:{os.path.getsize(input_path)}:"
+                  f"{','.join(model_features)}")
+    key = hashlib.sha1(key_source.encode()).hexdigest()
+    return os.path.join(cache_dir, f"preproc_{key}.parquet")
+
+def evict_preprocess_cache():
+    """
+    دالة لحذف أقدم ملفات التخزين المؤقت (LRU حسب وقت التعديل) عند تجاوز الحد الأقصى.
+    """
+    files = sorted(glob.glob(os.path.join(cache_dir, "preproc_*.parquet")), key=os.path.getmtime, reverse=True)
+    for old_file in files[max_cache_files:]:
+        os.remove(old_file)
 
-def preprocess_for_modeling(df):
+def load_preprocess_cache(input_path):
+    """
+    دالة لتحميل البيانات المحضرة من التخزين المؤقت إن وُجدت لملف الإدخال الحالي (دون قراءة ملف الإدخال نفسه).
+
+    Returns:
+        pandas.DataFrame: البيانات المحضرة، أو None إذا لم تكن مخزنة.
+    """
+    cache_path = get_preprocess_cache_path(input_path)
+    if not os.path.exists(cache_path):
+        return None
+    df_model = pd.read_parquet(cache_path)
+    os.utime(cache_path)  # تحديث وقت الاستخدام لسياسة LRU
+    print(f"تم تحميل البيانات المحضرة من التخزين المؤقت: {cache_path}")
+    return df_model
+
+def preprocess_for_modeling(df, input_path=None):
     """
     دالة لتحضير البيانات للنمذجة (إزالة الأعمدة غير الضرورية وترميز المتغيرات الفئوية).
+    إذا تم تمرير input_path، تُحفظ النتيجة في التخزين المؤقت ليقرأها load_preprocess_cache لاحقاً.
     """
-    features = ['gas_production_mcf', 'water_production_bbl', 'wellhead_pressure_psi', 
-                'tubing_pressure_psi', 'choke_size_in', 'pump_efficiency__', 'field_name']
-    target = 'oil_production_bbl'
+    target = model_target
+    cache_path = get_preprocess_cache_path(input_path) if input_path else None
     
-    features = [col for col in features if col in df.columns]
+    features = [col for col in model_features if col in df.columns]
     if target not in df.columns:
         raise ValueError(f"العمود المستهدف {target} غير موجود في البيانات!")
     
     df_model = df[features + [target]].copy()
     
-    # إضافة ميزة جديدة: نسبة إنتاج النفط إلى الماء
-    if 'water_production_bbl' in df_model.columns:
-        df_model['oil_to_water_ratio'] = df_model['oil_production_bbl'] / (df_model['water_production_bbl'] + 1e-6)
-    
+    # ترميز الحقل كرموز فئوية صغيرة (int16) يتعامل معها النموذج مباشرةً بدلاً من أعمدة dummies
     if 'field_name' in features:
-        df_model = pd.get_dummies(df_model, columns=['field_name'], drop_first=True)
+        df_model['field_name'] = df_model['field_name'].astype('category').cat.codes.astype(np.int16)
+    
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        df_model.to_parquet(cache_path, index=False)
+        evict_preprocess_cache()
     
     print("تم تحضير البيانات للنمذجة بنجاح.")
     return df_model, target
 
 def train_model(X, y):
     """
-    دالة لتدريب نموذج Random Forest.
+    دالة لتدريب نموذج Histogram Gradient Boosting.
     """
+    X = X.astype(np.float32)
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
+    categorical_features = [X.columns.get_loc('field_name')] if 'field_name' in X.columns else None
+    model = HistGradientBoostingRegressor(max_iter=200, learning_rate=0.1, random_state=42,
+                                          categorical_features=categorical_features)
     model.fit(X_train, y_train)
     
     y_pred = model.predict(X_test)
@@ -76,13 +120,14 @@ def create_predictions_plot(y_test, y_pred):
                       yaxis_title="القيم المتوقعة")
     return fig
 
-def create_feature_importance_plot(model, feature_names):
+def create_feature_importance_plot(model, X_test, y_test):
     """
-    دالة لإنشاء رسم لأهمية المتغيرات.
+    دالة لإنشاء رسم لأهمية المتغيرات (Permutation Importance على بيانات الاختبار).
     """
-    importances = model.feature_importances_
-    fig = px.bar(x=feature_names, y=importances,
-                 title="أهمية المتغيرات في نموذج Random Forest",
+    result = permutation_importance(model, X_test, y_test, n_repeats=5, random_state=42, n_jobs=-1)
+    importances = result.importances_mean
+    fig = px.bar(x=X_test.columns, y=importances,
+                 title="أهمية المتغيرات في نموذج Histogram Gradient Boosting",
                  labels={'x': 'المتغير', 'y': 'الأهمية'})
     return fig
 
@@ -93,10 +138,13 @@ def main(input_path=None):
     if input_path is None:
         input_path = os.path.join(base_dir, "data", "processed", "cleaned_oil_field_production_data_20250731.csv")
     
-    print(f"\n--- تحميل البيانات من: {input_path} ---")
-    df = load_data(input_path)
-    
-    df_model, target = preprocess_for_modeling(df)
+    # التحقق من التخزين المؤقت أولاً لتجنب قراءة ملف الإدخال بالكامل عند عدم تغيره
+    target = model_target
+    df_model = load_preprocess_cache(input_path)
+    if df_model is None:
+        print(f"\n--- تحميل البيانات من: {input_path} ---")
+        df = load_data(input_path)
+        df_model, target = preprocess_for_modeling(df, input_path=input_path)
     
     X = df_model.drop(columns=[target])
     y = df_model[target]
@@ -104,14 +152,16 @@ def main(input_path=None):
     model, X_test, y_test, y_pred, metrics = train_model(X, y)
     
     fig_predictions = create_predictions_plot(y_test, y_pred)
-    save_figure(fig_predictions, "predictions_vs_actual", output_dir=figures_dir)
+    # لاحقة تاريخ واحدة لجميع ملفات هذا التشغيل
+    date_suffix = get_date_suffix()
+    save_figure(fig_predictions, "predictions_vs_actual", output_dir=figures_dir, date_suffix=date_suffix)
     
-    fig_importance = create_feature_importance_plot(model, X.columns)
-    save_figure(fig_importance, "feature_importance", output_dir=figures_dir)
+    fig_importance = create_feature_importance_plot(model, X_test, y_test)
+    save_figure(fig_importance, "feature_importance", output_dir=figures_dir, date_suffix=date_suffix)
     
     report_title = "تقرير نمذجة إنتاج النفط"
     figures = [fig_predictions, fig_importance]
-    save_report(figures, report_title, "modeling_report", output_dir=reports_dir)
+    save_report(figures, report_title, "modeling_report", output_dir=reports_dir, date_suffix=date_suffix)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
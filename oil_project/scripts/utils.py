@@ -3,8 +3,9 @@ import pandas as pd
 import os
 import re
 from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
 import plotly.io as pio
-import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 from reportlab.lib.pagesizes import A4
@@ -14,20 +15,56 @@ from reportlab.lib.units import inch
 import arabic_reshaper
 from bidi.algorithm import get_display
 
-np.random.seed(42)
-
 # تحديد مسار المشروع الرئيسي
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 default_figures_dir = os.path.join(base_dir, "outputs", "figures")
 default_reports_dir = os.path.join(base_dir, "outputs", "reports")
 default_processed_data_dir = os.path.join(base_dir, "data", "processed")
 
-def load_data(file_path):
+# حدود عدد النقاط المرسلة إلى Plotly لتجنب ملفات HTML ضخمة وبطء العرض
+max_scatter_points = 50000
+max_timeseries_points = 10000
+timeseries_target_points = 5000
+
+# بذرة ثابتة لأخذ العينات؛ يُنشأ مولّد محلي في كل استدعاء حتى تُعطي نفس البيانات نفس العينة دائماً
+sample_seed = 42
+
+# نمط الرموز غير المسموح بها في أسماء الأعمدة (مُجمّع مرة واحدة)
+column_name_pattern = re.compile(r'[^a-zA-Z0-9_]')
+
+# استخدام orjson لتحويل الرسوم إلى JSON (يسلسل مصفوفات NumPy مباشرةً بلغة C)
+pio.json.config.default_engine = "orjson"
+
+# تهيئة عملية Kaleido مرة واحدة لإعادة استخدامها في جميع عمليات تصدير الصور
+kaleido_scope = getattr(pio.kaleido, "scope", None)
+if kaleido_scope is not None:
+    kaleido_scope.mathjax = None
+    kaleido_scope.default_format = "png"
+
+def read_csv_fast(file_path, columns=None):
     """
-    دالة لتحميل البيانات من ملف CSV.
+    دالة لقراءة ملف CSV باستخدام محرك pyarrow متعدد الخيوط إن كان متاحاً، مع الرجوع إلى المحرك الافتراضي.
     
     Args:
         file_path (str): مسار ملف CSV.
+        columns (list): الأعمدة المراد قراءتها فقط (اختياري، الافتراضي جميع الأعمدة).
+    
+    Returns:
+        pandas.DataFrame: إطار بيانات محمل.
+    """
+    try:
+        return pd.read_csv(file_path, engine="pyarrow", usecols=columns)
+    except ImportError:
+        return pd.read_csv(file_path, usecols=columns)
+
+def load_data(file_path, columns=None, downcast=True):
+    """
+    دالة لتحميل البيانات من ملف CSV أو Parquet (حسب امتداد الملف).
+    
+    Args:
+        file_path (str): مسار ملف CSV أو Parquet.
+        columns (list): الأعمدة المراد تحميلها فقط (اختياري، الافتراضي جميع الأعمدة).
+        downcast (bool): تقليص الأعمدة الرقمية إلى float32/أصغر نوع صحيح بعد التحميل.
     
     Returns:
         pandas.DataFrame: إطار بيانات محمل.
@@ -36,7 +73,12 @@ def load_data(file_path):
         FileNotFoundError: إذا لم يتم العثور على الملف.
     """
     try:
-        df = pd.read_csv(file_path)
+        if file_path.endswith(".parquet"):
+            df = pd.read_parquet(file_path, columns=columns)
+        else:
+            df = read_csv_fast(file_path, columns=columns)
+        if downcast:
+            df = downcast_dtypes(df)
         print(f"تم تحميل البيانات بنجاح من: {file_path}")
         return df
     except FileNotFoundError:
@@ -46,6 +88,54 @@ def load_data(file_path):
         print(f"خطأ أثناء تحميل البيانات: {e}")
         raise
 
+def load_data_chunks(file_path, chunksize=10**6, columns=None):
+    """
+    دالة لقراءة ملف CSV على دفعات بدلاً من تحميله بالكامل في الذاكرة.
+    
+    Args:
+        file_path (str): مسار ملف CSV.
+        chunksize (int): عدد الصفوف في كل دفعة.
+        columns (list): الأعمدة المراد قراءتها فقط (اختياري).
+    
+    Returns:
+        pandas.io.parsers.TextFileReader: مُكرِّر يُرجع إطارات بيانات متتالية.
+    """
+    return pd.read_csv(file_path, chunksize=chunksize, usecols=columns, engine="c")
+
+def streaming_corr(file_path, numeric_cols, chunksize=10**6):
+    """
+    دالة لحساب مصفوفة الارتباط لملف CSV كبير دفعةً تلو الأخرى دون تحميله بالكامل
+    (بتجميع المجاميع ومجاميع الضرب لكل دفعة). يتم تجاهل الصفوف التي تحتوي على قيم مفقودة.
+    
+    Args:
+        file_path (str): مسار ملف CSV.
+        numeric_cols (list): قائمة الأعمدة الرقمية.
+        chunksize (int): عدد الصفوف في كل دفعة.
+    
+    Returns:
+        numpy.ndarray: مصفوفة الارتباط.
+    """
+    n = 0
+    shift = None
+    sums = np.zeros(len(numeric_cols))
+    sums_xy = np.zeros((len(numeric_cols), len(numeric_cols)))
+    for chunk in load_data_chunks(file_path, chunksize=chunksize, columns=numeric_cols):
+        X = chunk[numeric_cols].dropna().to_numpy(dtype=np.float64)
+        if not len(X):
+            continue
+        if shift is None:
+            # إزاحة القيم بمتوسط أول دفعة لتحسين الدقة العددية
+            shift = X.mean(axis=0)
+        X -= shift
+        n += len(X)
+        sums += X.sum(axis=0)
+        sums_xy += X.T @ X
+    if n < 2:
+        return np.full((len(numeric_cols), len(numeric_cols)), np.nan)
+    cov = (sums_xy - np.outer(sums, sums) / n) / (n - 1)
+    std = np.sqrt(np.diag(cov))
+    return cov / np.outer(std, std)
+
 def clean_column_names(df):
     """
     دالة لتنظيف أسماء الأعمدة (إزالة المسافات، تحويل إلى حروف صغيرة، إزالة الرموز).
@@ -56,11 +146,54 @@ def clean_column_names(df):
     Returns:
         pandas.DataFrame: إطار بيانات بأسماء أعمدة نظيفة.
     """
-    df.columns = [re.sub(r'[^a-zA-Z0-9_]', '_', col.lower().strip()) for col in df.columns]
+    df.columns = df.columns.str.strip().str.lower().str.replace(column_name_pattern, '_', regex=True)
     print("تم تنظيف أسماء الأعمدة بنجاح.")
     return df
 
-def save_figure(fig, filename, output_dir=default_figures_dir):
+def downcast_dtypes(df, categorical_cols=None):
+    """
+    دالة لتقليص أنواع البيانات الرقمية (float32/int32) وتحويل الأعمدة النصية المحددة إلى category.
+    
+    Args:
+        df (pandas.DataFrame): إطار البيانات.
+        categorical_cols (list): الأعمدة المراد تحويلها إلى category (اختياري).
+    
+    Returns:
+        pandas.DataFrame: إطار بيانات بأنواع أصغر حجماً.
+    """
+    for col in df.select_dtypes(include='float').columns:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    for col in df.select_dtypes(include='integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in categorical_cols or []:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+def figure_to_png(fig, width=None, height=None):
+    """
+    دالة لتحويل الرسم البياني إلى بيانات PNG في الذاكرة باستخدام عملية Kaleido المشتركة.
+    
+    Args:
+        fig: كائن Plotly للرسم البياني أو قاموس مواصفاته (fig.to_dict()).
+        width (int): عرض الصورة بالبكسل (اختياري).
+        height (int): ارتفاع الصورة بالبكسل (اختياري).
+    
+    Returns:
+        bytes: بيانات صورة PNG.
+    """
+    return pio.to_image(fig, format="png", width=width, height=height, validate=False)
+
+def get_date_suffix():
+    """
+    دالة لإرجاع لاحقة التاريخ الحالي المستخدمة في أسماء ملفات الإخراج (YYYYMMDD).
+    
+    Returns:
+        str: لاحقة التاريخ.
+    """
+    return datetime.now().strftime("%Y%m%d")
+
+def save_figure(fig, filename, output_dir=default_figures_dir, date_suffix=None):
     """
     دالة لحفظ الرسوم البيانية بصيغتي HTML و PNG.
     
@@ -68,21 +201,26 @@ def save_figure(fig, filename, output_dir=default_figures_dir):
         fig: كائن Plotly للرسم البياني.
         filename (str): اسم الملف (بدون الامتداد).
         output_dir (str): مسار مجلد الإخراج.
+        date_suffix (str): لاحقة التاريخ لاسم الملف (اختياري، الافتراضي تاريخ اليوم).
     
     Returns:
         str: مسار ملف PNG.
     """
     os.makedirs(output_dir, exist_ok=True)
-    date_suffix = datetime.now().strftime("%Y%m%d")
+    date_suffix = date_suffix or get_date_suffix()
     html_path = os.path.join(output_dir, f"{filename}_{date_suffix}.html")
     png_path = os.path.join(output_dir, f"{filename}_{date_suffix}.png")
     
-    fig.write_html(html_path)
-    fig.write_image(png_path)
+    # تحويل الرسم إلى قاموس مرة واحدة واستخدامه لكل من HTML و PNG
+    spec = fig.to_dict()
+    with open(html_path, "w", encoding="utf-8") as f:
+        f.write(pio.to_html(spec, validate=False, include_plotlyjs="cdn"))
+    with open(png_path, "wb") as f:
+        f.write(figure_to_png(spec))
     print(f"تم حفظ الرسم البياني في: {html_path} و {png_path}")
     return png_path
 
-def save_dataframe(df, filename, output_dir=default_processed_data_dir):
+def save_dataframe(df, filename, output_dir=default_processed_data_dir, date_suffix=None):
     """
     دالة لحفظ إطار البيانات كملف CSV.
     
@@ -90,14 +228,52 @@ def save_dataframe(df, filename, output_dir=default_processed_data_dir):
         df (pandas.DataFrame): إطار البيانات.
         filename (str): اسم الملف (بدون الامتداد).
         output_dir (str): مسار مجلد الإخراج.
+        date_suffix (str): لاحقة التاريخ لاسم الملف (اختياري، الافتراضي تاريخ اليوم).
+    
+    Returns:
+        str: مسار ملف CSV.
     """
     os.makedirs(output_dir, exist_ok=True)
-    date_suffix = datetime.now().strftime("%Y%m%d")
+    date_suffix = date_suffix or get_date_suffix()
     output_path = os.path.join(output_dir, f"{filename}_{date_suffix}.csv")
     df.to_csv(output_path, index=False)
     print(f"تم حفظ البيانات في: {output_path}")
+    return output_path
+
+@lru_cache(maxsize=2048)
+def reshape_arabic(text):
+    """
+    دالة لإعادة تشكيل النص العربي وترتيبه للعرض من اليمين لليسار (مع تخزين النتائج للنصوص المتكررة).
+    
+    Args:
+        text (str): النص العربي.
+    
+    Returns:
+        str: النص الجاهز للعرض في التقرير.
+    """
+    reshaped_text = arabic_reshaper.reshape(text)
+    return get_display(reshaped_text)
+
+report_intro_text = """
+    هذا التقرير يحتوي على تحليل بيانات إنتاج النفط، بما في ذلك الرسوم البيانية التي توضح العلاقات بين المتغيرات المختلفة.
+    يتضمن التقرير هيستوغرامات، رسوم مبعثرة، رسوم صندوقية، خرائط حرارية، وسلاسل زمنية لتحليل البيانات.
+    """
+report_intro_text_ar = reshape_arabic(report_intro_text)
 
-def save_report(figures, title, filename, output_dir=default_reports_dir):
+# أنماط التقرير تُبنى مرة واحدة عند تحميل الوحدة بدلاً من كل استدعاء لـ save_report
+report_styles = getSampleStyleSheet()
+arabic_paragraph_style = ParagraphStyle(
+    name='Arabic',
+    parent=report_styles['Normal'],
+    fontName='Helvetica',  # يمكن استخدام خط Amiri إذا تم تثبيته
+    fontSize=12,
+    leading=14,
+    alignment=2,  # محاذاة يمين
+    spaceAfter=12
+)
+report_title_style = ParagraphStyle(name='Title', fontSize=16, alignment=2)
+
+def save_report(figures, title, filename, output_dir=default_reports_dir, date_suffix=None):
     """
     دالة لحفظ تقرير PDF مرتب باللغة العربية.
     
@@ -106,50 +282,93 @@ def save_report(figures, title, filename, output_dir=default_reports_dir):
         title (str): عنوان التقرير.
         filename (str): اسم الملف (بدون الامتداد).
         output_dir (str): مسار مجلد الإخراج.
+        date_suffix (str): لاحقة التاريخ لاسم الملف (اختياري، الافتراضي تاريخ اليوم).
     """
     os.makedirs(output_dir, exist_ok=True)
-    date_suffix = datetime.now().strftime("%Y%m%d")
+    date_suffix = date_suffix or get_date_suffix()
     output_path = os.path.join(output_dir, f"{filename}_{date_suffix}.pdf")
     
     doc = SimpleDocTemplate(output_path, pagesize=A4, rightMargin=inch, leftMargin=inch, topMargin=inch, bottomMargin=inch)
-    styles = getSampleStyleSheet()
-    
-    arabic_style = ParagraphStyle(
-        name='Arabic',
-        parent=styles['Normal'],
-        fontName='Helvetica',  # يمكن استخدام خط Amiri إذا تم تثبيته
-        fontSize=12,
-        leading=14,
-        alignment=2,  # محاذاة يمين
-        spaceAfter=12
-    )
-    
-    def reshape_arabic(text):
-        reshaped_text = arabic_reshaper.reshape(text)
-        return get_display(reshaped_text)
     
     elements = []
-    elements.append(Paragraph(reshape_arabic(title), ParagraphStyle(name='Title', fontSize=16, alignment=2)))
+    elements.append(Paragraph(reshape_arabic(title), report_title_style))
     elements.append(Spacer(1, 0.2 * inch))
     
-    intro_text = """
-    هذا التقرير يحتوي على تحليل بيانات إنتاج النفط، بما في ذلك الرسوم البيانية التي توضح العلاقات بين المتغيرات المختلفة.
-    يتضمن التقرير هيستوغرامات، رسوم مبعثرة، رسوم صندوقية، خرائط حرارية، وسلاسل زمنية لتحليل البيانات.
-    """
-    elements.append(Paragraph(reshape_arabic(intro_text), arabic_style))
+    elements.append(Paragraph(report_intro_text_ar, arabic_paragraph_style))
     elements.append(Spacer(1, 0.2 * inch))
     
-    for i, fig in enumerate(figures):
-        temp_png = save_figure(fig, f"temp_fig_{i}", output_dir=os.path.join(base_dir, "outputs", "figures"))
+    # تحويل جميع الرسوم إلى PNG في الذاكرة عبر Kaleido المشترك بنسبة 3:2 لتطابق أبعاد الصورة في التقرير
+    png_images = [figure_to_png(fig, width=900, height=600) for fig in figures]
+    
+    for fig, png_bytes in zip(figures, png_images):
         fig_title = reshape_arabic(fig.layout.title.text)
-        elements.append(Paragraph(fig_title, arabic_style))
-        img = Image(temp_png, width=6*inch, height=4*inch)
+        elements.append(Paragraph(fig_title, arabic_paragraph_style))
+        img = Image(BytesIO(png_bytes), width=6*inch, height=4*inch)
         elements.append(img)
         elements.append(Spacer(1, 0.2 * inch))
     
     doc.build(elements)
     print(f"تم حفظ التقرير في: {output_path}")
 
+def pearson_corr(x, y):
+    """
+    دالة لحساب معامل ارتباط بيرسون بين مصفوفتين رقميتين باستخدام NumPy مباشرةً (مع تجاهل القيم المفقودة).
+    
+    Args:
+        x (numpy.ndarray): المصفوفة الأولى.
+        y (numpy.ndarray): المصفوفة الثانية.
+    
+    Returns:
+        float: معامل الارتباط، أو NaN إذا كانت البيانات غير كافية.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if not valid.all():
+        x, y = x[valid], y[valid]
+    if x.size < 2:
+        return float('nan')
+    xc = x - x.mean()
+    yc = y - y.mean()
+    denom = np.sqrt(np.dot(xc, xc) * np.dot(yc, yc))
+    return float(np.dot(xc, yc) / denom) if denom else float('nan')
+
+def lttb_indices(x, y, n_out):
+    """
+    دالة لاختيار n_out نقطة تمثيلية من سلسلة زمنية باستخدام خوارزمية
+    Largest-Triangle-Three-Buckets مع الحفاظ على الشكل البصري للسلسلة.
+    
+    Args:
+        x (numpy.ndarray): قيم المحور السيني (مرتبة تصاعدياً).
+        y (numpy.ndarray): قيم المحور الصادي.
+        n_out (int): عدد النقاط المطلوبة.
+    
+    Returns:
+        numpy.ndarray: مؤشرات النقاط المختارة.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bucket_size = (n - 2) / (n_out - 2)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        # متوسط الدلو التالي
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # اختيار النقطة التي تشكل أكبر مثلث مع النقطة السابقة ومتوسط الدلو التالي
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
 def create_histogram(df, column):
     """
     دالة لإنشاء هيستوغرام.
@@ -161,10 +380,32 @@ def create_histogram(df, column):
     Returns:
         plotly.graph_objects.Figure: الرسم البياني.
     """
-    fig = px.histogram(df, x=column, title=f"توزيع {column}",
-                       labels={column: column}, nbins=30)
-    fig.update_layout(xaxis_title=column, yaxis_title="العدد", title_x=0.5)
-    return fig
+    # حساب عدد القيم في كل فئة مسبقاً بـ NumPy وإرسال 30 عموداً فقط بدلاً من جميع القيم
+    arr = df[column].to_numpy(dtype="float64", na_value=np.nan)
+    arr = arr[np.isfinite(arr)]
+    counts, edges = np.histogram(arr, bins=30)
+    centers = (edges[:-1] + edges[1:]) / 2
+    data = [{"type": "bar", "x": centers, "y": counts, "width": np.diff(edges), "name": column}]
+    layout = {"title": {"text": f"توزيع {column}", "x": 0.5}, "bargap": 0,
+              "xaxis": {"title": {"text": column}}, "yaxis": {"title": {"text": "العدد"}}}
+    return go.Figure(data=data, layout=layout)
+
+def categorize_column(df, column):
+    """
+    دالة لتحويل عمود نصي إلى نوع category حتى يتم التجميع على الرموز الرقمية بدلاً من النصوص.
+    
+    Args:
+        df (pandas.DataFrame): إطار البيانات.
+        column (str): اسم العمود (أو None).
+    
+    Returns:
+        pandas.DataFrame: إطار البيانات مع العمود محوّلاً (أو كما هو إذا لم يكن نصياً).
+    """
+    if column is None or isinstance(df[column].dtype, pd.CategoricalDtype):
+        return df
+    if pd.api.types.is_object_dtype(df[column]) or pd.api.types.is_string_dtype(df[column]):
+        df = df.assign(**{column: df[column].astype("category")})
+    return df
 
 def create_scatter(df, x_col, y_col, color_col=None):
     """
@@ -179,11 +420,23 @@ def create_scatter(df, x_col, y_col, color_col=None):
     Returns:
         plotly.graph_objects.Figure: الرسم البياني.
     """
-    fig = px.scatter(df, x=x_col, y=y_col, color=color_col,
-                     title=f"{y_col} مقابل {x_col}",
-                     labels={x_col: x_col, y_col: y_col})
-    fig.update_layout(title_x=0.5)
-    return fig
+    df = categorize_column(df, color_col)
+    if len(df) > max_scatter_points:
+        rng = np.random.default_rng(sample_seed)
+        df = df.iloc[np.sort(rng.choice(len(df), size=max_scatter_points, replace=False))]
+    # استخدام WebGL للبيانات الكبيرة كما يفعل plotly.express تلقائياً
+    trace_type = "scattergl" if len(df) > 1000 else "scatter"
+    layout = {"title": {"text": f"{y_col} مقابل {x_col}", "x": 0.5},
+              "xaxis": {"title": {"text": x_col}}, "yaxis": {"title": {"text": y_col}}}
+    if color_col is None:
+        data = [{"type": trace_type, "mode": "markers",
+                 "x": df[x_col].to_numpy(), "y": df[y_col].to_numpy()}]
+    else:
+        data = [{"type": trace_type, "mode": "markers", "name": str(name), "legendgroup": str(name),
+                 "x": group[x_col].to_numpy(), "y": group[y_col].to_numpy()}
+                for name, group in df.groupby(color_col, sort=False, observed=True)]
+        layout["legend"] = {"title": {"text": color_col}}
+    return go.Figure(data=data, layout=layout)
 
 def create_boxplot(df, column, group_by=None):
     """
@@ -197,28 +450,50 @@ def create_boxplot(df, column, group_by=None):
     Returns:
         plotly.graph_objects.Figure: الرسم البياني.
     """
-    fig = px.box(df, x=group_by, y=column, title=f"صندوقي لـ {column}",
-                 labels={column: column, group_by: group_by})
-    fig.update_layout(title_x=0.5)
-    return fig
+    df = categorize_column(df, group_by)
+    trace = {"type": "box", "y": df[column].to_numpy()}
+    layout = {"title": {"text": f"صندوقي لـ {column}", "x": 0.5}, "yaxis": {"title": {"text": column}}}
+    if group_by is not None:
+        # إرسال رموز الفئات فقط مع خريطة الأسماء للمحور، بحيث يظهر كل اسم مرة واحدة بدلاً من تكراره لكل صف
+        groups = df[group_by]
+        if isinstance(groups.dtype, pd.CategoricalDtype):
+            groups = groups.cat.remove_unused_categories()
+            codes = groups.cat.codes.to_numpy()
+            valid = codes >= 0
+            trace["x"] = codes[valid]
+            trace["y"] = trace["y"][valid]
+            layout["xaxis"] = {"title": {"text": group_by},
+                               "tickvals": list(range(len(groups.cat.categories))),
+                               "ticktext": [str(c) for c in groups.cat.categories]}
+        else:
+            trace["x"] = groups.to_numpy()
+            layout["xaxis"] = {"title": {"text": group_by}}
+    return go.Figure(data=[trace], layout=layout)
 
-def create_heatmap(df, numeric_cols):
+def create_heatmap(df, numeric_cols, corr=None):
     """
     دالة لإنشاء خريطة حرارية للارتباطات.
     
     Args:
-        df (pandas.DataFrame): إطار البيانات.
+        df (pandas.DataFrame): إطار البيانات (يمكن أن يكون None عند تمرير corr).
         numeric_cols (list): قائمة الأعمدة الرقمية.
+        corr (numpy.ndarray): مصفوفة ارتباط محسوبة مسبقاً، مثل ناتج streaming_corr (اختياري).
     
     Returns:
         plotly.graph_objects.Figure: الرسم البياني.
     """
-    corr = df[numeric_cols].corr()
-    fig = go.Figure(data=go.Heatmap(
-        z=corr.values, x=corr.columns, y=corr.columns,
-        colorscale='Viridis'))
-    fig.update_layout(title="خريطة حرارية للارتباطات", title_x=0.5)
-    return fig
+    if corr is None:
+        # حساب الارتباط عبر NumPy على مصفوفة float32 متجاورة لتقليل حركة الذاكرة:
+        # توحيد الأعمدة مرة واحدة ثم عملية ضرب مصفوفات واحدة (BLAS)
+        X = np.array(df[numeric_cols].to_numpy(dtype=np.float32), order='C')
+        X = X[~np.isnan(X).any(axis=1)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            X -= X.mean(axis=0)
+            X /= X.std(axis=0, ddof=1)
+            corr = (X.T @ X) / (len(X) - 1)
+    data = [{"type": "heatmap", "z": np.asarray(corr, dtype=np.float32), "x": numeric_cols, "y": numeric_cols, "colorscale": "Viridis"}]
+    layout = {"title": {"text": "خريطة حرارية للارتباطات", "x": 0.5}}
+    return go.Figure(data=data, layout=layout)
 
 def create_timeseries(df, date_col, value_col):
     """
@@ -232,7 +507,17 @@ def create_timeseries(df, date_col, value_col):
     Returns:
         plotly.graph_objects.Figure: الرسم البياني.
     """
-    fig = px.line(df, x=date_col, y=value_col, title=f"سلسلة زمنية لـ {value_col}",
-                  labels={date_col: "التاريخ", value_col: value_col})
-    fig.update_layout(title_x=0.5)
-    return fig
\ No newline at end of file
+    if len(df) > max_timeseries_points:
+        # تقليص السلسلة الطويلة بخوارزمية LTTB للحفاظ على شكلها بعدد نقاط محدود
+        df = df.dropna(subset=[value_col])
+        dates = pd.to_datetime(df[date_col])
+        if not dates.is_monotonic_increasing:
+            order = np.argsort(dates.to_numpy(), kind='stable')
+            df, dates = df.iloc[order], dates.iloc[order]
+        keep = lttb_indices(dates.to_numpy().astype("datetime64[ns]").view("i8"), df[value_col].to_numpy(),
+                            timeseries_target_points)
+        df = df.iloc[keep]
+    data = [{"type": "scatter", "mode": "lines", "x": df[date_col].to_numpy(), "y": df[value_col].to_numpy()}]
+    layout = {"title": {"text": f"سلسلة زمنية لـ {value_col}", "x": 0.5},
+              "xaxis": {"title": {"text": "التاريخ"}}, "yaxis": {"title": {"text": value_col}}}
+    return go.Figure(data=data, layout=layout)
\ No newline at end of file